@@ -23,25 +23,109 @@ Author: Generated CLI Tool
 """
 
 import argparse
+import functools
 import os
+import re
 import sys
-from typing import Optional
+from typing import Any, Optional, Union
 from urllib.parse import urljoin, urlparse, urlunparse
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
 
+# Prefer the C-backed lxml parser; fall back to the pure-Python parser if lxml is not installed
+try:
+    import lxml  # noqa: F401
+    BS4_PARSER = 'lxml'
+except ImportError:
+    BS4_PARSER = 'html.parser'
+
+# Optional: selectolax (Lexbor engine) for C-level parsing and traversal; BeautifulSoup is the fallback
+SELECTOLAX_AVAILABLE = False
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    pass
+
+# A parsed element from whichever backend is active (selectolax LexborNode or bs4 Tag)
+Node = Any
 
 # Constants
 DEFAULT_START_URL = "https://docs.molt.bot/"
 DEFAULT_OUTPUT_FILE = "output/links.txt"
 USER_AGENT = "SidebarLinkExtractor/1.0 (Python CLI tool for extracting sidebar navigation links)"
 REQUEST_TIMEOUT = (10, 30)  # (connect timeout, read timeout)
+URL_CACHE_SIZE = 4096  # Max memoized normalize_url results per run
+
+# Common-case absolute href: scheme, netloc, path, ?query, #fragment. Whitespace/control
+# characters and ';params' are left to urljoin/urlparse, which treat them specially.
+ABSOLUTE_URL_PATTERN = re.compile(r'^(https?)://([^/?#\x00-\x20]+)(/[^?#;\x00-\x20]*)?(\?[^#\x00-\x20]*)?(#[^\x00-\x20]*)?$')
+
+# Sidebar-like containers: these tags with an id/class containing one of these substrings
+SIDEBAR_TAGS = ('nav', 'aside', 'div', 'ul')
+SIDEBAR_PATTERNS = ('sidebar', 'md-nav', 'site-nav')
+# Single case-insensitive selector group so the parser's selector engine does the filtering
+SIDEBAR_PATTERN_SELECTOR = ', '.join(
+    f'{tag}[{attr}*="{pattern}" i]'
+    for tag in SIDEBAR_TAGS
+    for attr in ('id', 'class')
+    for pattern in SIDEBAR_PATTERNS
+)
+
+# Known sidebar selectors in priority order: (selector, description)
+SELECTOR_STRATEGIES = [
+    ('nav[aria-label="Navigation"]', 'nav with aria-label="Navigation"'),
+    ('nav[role="navigation"]', 'nav with role="navigation"'),
+    ('aside nav', 'nav inside aside element'),
+]
+
+# A candidate matching the first (most specific) selector strategy, labelled "Navigation" and
+# with at least this many internal links, is accepted immediately without scoring the rest
+HIGH_CONFIDENCE_MIN_LINKS = 10
+
+# Every strategy plus the id/class patterns as one selector group (see select_sidebar_candidates)
+CANDIDATE_SELECTOR = ', '.join([selector for selector, _ in SELECTOR_STRATEGIES] + [SIDEBAR_PATTERN_SELECTOR])
+
+# "On this page" TOC marker (group 1) or "navigation" label (group 2), matched case-insensitively in one pass
+# "navigation" leaves its final "on" unconsumed so "...navigation this page" still finds the TOC marker
+TEXT_FLAG_PATTERN = re.compile(r'(on this page)|(navigati(?=on))', re.IGNORECASE)
+# Longest text TEXT_FLAG_PATTERN matches; scan_text_flags() carries this much across text nodes
+TEXT_FLAG_MAX_LENGTH = len('on this page')
 
 
-def normalize_url(href: str, base_url: str, target_origin: str) -> Optional[str]:
+def create_session() -> requests.Session:
+    """Create an HTTP session with connection pooling and retries on transient server errors."""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    # Advertise every compression scheme urllib3 can decode (br/zstd only when brotli/zstandard are installed)
+    session.headers.update(make_headers(accept_encoding=True))
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=100,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False  # Hand the final response back so raise_for_status() reports it
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Shared session so repeated fetches reuse TCP/TLS connections (HTTP keep-alive)
+SESSION = create_session()
+
+
+@functools.lru_cache(maxsize=URL_CACHE_SIZE)
+def normalize_url(href: str, base_url: str, target_netloc: str) -> Optional[str]:
     """
-    Normalize a URL:
+    Normalize a URL (target_netloc is the start URL's host, computed once per run):
     - Resolve relative hrefs against base_url
     - Strip fragments (#...)
     - Keep query strings
@@ -58,6 +142,17 @@ def normalize_url(href: str, base_url: str, target_origin: str) -> Optional[str]
     if href.startswith('#'):
         return None
     
+    # Fast path: plain absolute URLs are normalized with string ops (same result as below)
+    match = ABSOLUTE_URL_PATTERN.match(href)
+    if match:
+        _, netloc, path, query, _ = match.groups()
+        if netloc != target_netloc:
+            return None  # External URL, exclude
+        path = path or ''
+        path = path.rstrip('/') if path != '/' else '/'
+        query = query[1:] if query else ''
+        return f"https://{netloc}{path}?{query}" if query else f"https://{netloc}{path}"
+    
     # Resolve relative URL against base
     absolute_url = urljoin(base_url, href)
     
@@ -65,8 +160,7 @@ def normalize_url(href: str, base_url: str, target_origin: str) -> Optional[str]
     parsed = urlparse(absolute_url)
     
     # Check if same origin
-    target_parsed = urlparse(target_origin)
-    if parsed.netloc != target_parsed.netloc:
+    if parsed.netloc != target_netloc:
         return None  # External URL, exclude
     
     # Normalize: ensure https scheme for this domain
@@ -87,18 +181,159 @@ def normalize_url(href: str, base_url: str, target_origin: str) -> Optional[str]
     return normalized
 
 
-def count_internal_links(element: Tag, base_url: str, target_origin: str) -> int:
-    """Count the number of internal links within an element."""
-    count = 0
-    for a_tag in element.find_all('a', href=True):
-        href = a_tag.get('href', '')
-        normalized = normalize_url(href, base_url, target_origin)
+def declared_charset(headers: Any) -> Optional[str]:
+    """Return the charset named in a response's Content-Type header, or None if it names none."""
+    # get_encoding_from_headers() falls back to ISO-8859-1 for any text/* type, which
+    # would override a page's own <meta charset>, so only trust an explicit charset
+    if 'charset' not in (headers.get('content-type') or '').lower():
+        return None
+    return requests.utils.get_encoding_from_headers(headers)
+
+
+def decode_body(body: bytes, charset: Optional[str]) -> Union[str, bytes]:
+    """
+    Decode a response body with its declared charset.
+    
+    Neither parser sees the HTTP header, so a declared charset is applied here. Without one
+    (or with an unknown one) the raw bytes are returned and parse_html() has the parser
+    detect the encoding from the BOM or <meta charset>.
+    """
+    if charset:
+        try:
+            return body.decode(charset, errors='replace')
+        except LookupError:
+            pass
+    return body
+
+
+def parse_html(html: Union[str, bytes]) -> Node:
+    """Parse HTML with selectolax if installed, otherwise with BeautifulSoup."""
+    if SELECTOLAX_AVAILABLE:
+        # Lexbor reads bytes as UTF-8 unless asked to detect the encoding (BOM / <meta charset>)
+        document = LexborHTMLParser(html, encoding=isinstance(html, bytes))
+        # text() includes <script>/<style> contents, which bs4's get_text() skips; drop them
+        # so both backends score and label links from the same text
+        document.strip_tags(['script', 'style'], recursive=True)
+        return document
+    return BeautifulSoup(html, BS4_PARSER)
+
+
+def get_attribute(node: Node, name: str) -> str:
+    """Return an attribute value as a string ('' if missing, multi-valued attributes space-joined)."""
+    if SELECTOLAX_AVAILABLE:
+        return node.attributes.get(name) or ''
+    value = node.get(name, '')
+    return ' '.join(value) if isinstance(value, list) else (value or '')
+
+
+def scan_text_flags(element: Node) -> tuple[bool, bool]:
+    """
+    Scan an element's text for the "on this page" TOC marker and "navigation".
+    
+    Returns (has_on_this_page, has_navigation). Stops at the first TOC marker, since
+    those candidates are excluded anyway.
+    """
+    if SELECTOLAX_AVAILABLE:
+        # Lexbor joins the text in C, which beats walking text nodes from Python. It keeps a
+        # separator for whitespace-only nodes ("on this  page"), so join on NUL (never in
+        # parsed text) and drop the empty pieces to match bs4's space-joined text
+        # (skip_empty=True only skips ASCII whitespace, so an &nbsp; node would still split it)
+        pieces = element.text(separator='\x00', strip=True).split('\x00')
+        strings = (' '.join(filter(None, pieces)),)
+    else:
+        # Walk text nodes lazily instead of building the whole subtree's text first
+        strings = element.stripped_strings
+    
+    has_navigation = False
+    tail = ''
+    for text in strings:
+        # Prefix the end of the previous string so a marker split across text nodes
+        # (e.g. "On <b>this</b> page") matches as it would in the space-joined text
+        if tail:
+            text = f'{tail} {text}'
+        for match in TEXT_FLAG_PATTERN.finditer(text):
+            if match.group(1):
+                return True, has_navigation
+            has_navigation = True
+        tail = text[-TEXT_FLAG_MAX_LENGTH:]
+    return False, has_navigation
+
+
+def node_key(node: Node) -> int:
+    """Return a stable identity for a node (selectolax creates a new wrapper object per query)."""
+    if SELECTOLAX_AVAILABLE:
+        return node.mem_id
+    return id(node)
+
+
+def select_sidebar_candidates(document: Node) -> tuple[list[list[Node]], list[Node]]:
+    """
+    Find sidebar candidates for every selector strategy and id/class pattern.
+    
+    Returns (matches per SELECTOR_STRATEGIES entry, id/class pattern matches), each in
+    document order. A node is listed once, under the first strategy it satisfies.
+    
+    With BeautifulSoup each select() is a Python-level walk of the whole document, so the
+    selectors run as one group and each match is classified with css.match(). Lexbor walks
+    in C (and its css_matches() tests a node's subtree, not the node), so it keeps one
+    query per selector.
+    """
+    strategy_matches: list[list[Node]] = [[] for _ in SELECTOR_STRATEGIES]
+    pattern_matches: list[Node] = []
+    seen_ids: set[int] = set()  # node_key() of every candidate, for O(1) duplicate checks
+    
+    if SELECTOLAX_AVAILABLE:
+        for index, (selector, _) in enumerate(SELECTOR_STRATEGIES):
+            for node in document.css(selector):
+                if node_key(node) not in seen_ids:
+                    seen_ids.add(node_key(node))
+                    strategy_matches[index].append(node)
+        # Lexbor may return a node once per selector it matches in the group
+        for node in document.css(SIDEBAR_PATTERN_SELECTOR):
+            if node_key(node) not in seen_ids:
+                seen_ids.add(node_key(node))
+                pattern_matches.append(node)
+        return strategy_matches, pattern_matches
+    
+    for node in document.select(CANDIDATE_SELECTOR):
+        for index, (selector, _) in enumerate(SELECTOR_STRATEGIES):
+            if node.css.match(selector):
+                strategy_matches[index].append(node)
+                break
+        else:
+            pattern_matches.append(node)
+    return strategy_matches, pattern_matches
+
+
+def find_links(node: Node) -> list[tuple[Node, str]]:
+    """Return (<a> element, href) for every <a href> under a node, in document order."""
+    # The selector/href=True filter guarantees the attribute, so index it directly
+    # (selectolax's lazy attrs avoids building a dict of every attribute)
+    if SELECTOLAX_AVAILABLE:
+        return [(a_tag, a_tag.attrs['href']) for a_tag in node.css('a[href]')]
+    return [(a_tag, a_tag['href']) for a_tag in node.find_all('a', href=True)]
+
+
+def collect_internal_links(element: Node, base_url: str, target_netloc: str) -> list[str]:
+    """
+    Collect the normalized internal links within an element, in DOM order.
+    
+    Duplicates are kept so len() matches the link count used for scoring.
+    """
+    links: list[str] = []
+    for _, href in find_links(element):
+        normalized = normalize_url(href, base_url, target_netloc)
         if normalized:
-            count += 1
-    return count
+            links.append(normalized)
+    return links
 
 
-def find_sidebar_container(soup: BeautifulSoup, base_url: str, target_origin: str, verbose: bool = False) -> Optional[Tag]:
+def find_sidebar_container(
+    document: Node,
+    base_url: str,
+    target_netloc: str,
+    verbose: bool = False
+) -> Optional[tuple[Node, list[str]]]:
     """
     Find the primary sidebar navigation container using heuristics.
     
@@ -106,33 +341,28 @@ def find_sidebar_container(soup: BeautifulSoup, base_url: str, target_origin: st
     1. Try known selectors
     2. Score candidates and pick the best one
     3. Exclude candidates containing "On this page" text
-    """
-    candidates: list[tuple[Tag, str, int]] = []  # (element, reason, score)
     
-    # Selector strategies in priority order
-    selector_strategies = [
-        ('nav[aria-label="Navigation"]', 'nav with aria-label="Navigation"'),
-        ('nav[role="navigation"]', 'nav with role="navigation"'),
-        ('aside nav', 'nav inside aside element'),
-    ]
+    A candidate matching SELECTOR_STRATEGIES[0] with "Navigation" text and at least
+    HIGH_CONFIDENCE_MIN_LINKS internal links is returned as soon as it is scored. Generic
+    selectors (e.g. nav[role="navigation"]) also match header navbars, so they are always scored.
+    
+    Returns:
+        (container, internal links collected while scoring it), or None if no sidebar was found
+    """
+    candidates: list[tuple[Node, str, Optional[int]]] = []  # (element, reason, SELECTOR_STRATEGIES index)
+    strategy_matches, pattern_matches = select_sidebar_candidates(document)
     
     # Try CSS selectors first
-    for selector, description in selector_strategies:
-        elements = soup.select(selector)
+    for index, ((_, description), elements) in enumerate(zip(SELECTOR_STRATEGIES, strategy_matches)):
         for el in elements:
-            candidates.append((el, description, 0))
-    
-    # Try id/class containing "sidebar" or "nav" patterns
-    # Common patterns: md-sidebar, sidebar, nav, md-nav
-    for tag in soup.find_all(['nav', 'aside', 'div', 'ul']):
-        tag_id = tag.get('id', '') or ''
-        tag_class = ' '.join(tag.get('class', []))
-        combined = f"{tag_id} {tag_class}".lower()
-        
-        if 'sidebar' in combined or 'md-nav' in combined or 'site-nav' in combined:
-            # Avoid duplicates
-            if tag not in [c[0] for c in candidates]:
-                candidates.append((tag, f'element with id/class containing sidebar/nav pattern: {tag_id or tag_class[:50]}', 0))
+            candidates.append((el, description, index))
+    
+    # Then id/class containing "sidebar" or "nav" patterns
+    # Common patterns: md-sidebar, sidebar, md-nav, site-nav
+    for tag in pattern_matches:
+        tag_id = get_attribute(tag, 'id')
+        tag_class = get_attribute(tag, 'class')
+        candidates.append((tag, f'element with id/class containing sidebar/nav pattern: {tag_id or tag_class[:50]}', None))
     
     if not candidates:
         return None
@@ -141,13 +371,13 @@ def find_sidebar_container(soup: BeautifulSoup, base_url: str, target_origin: st
         print(f"[DEBUG] Found {len(candidates)} initial sidebar candidates")
     
     # Filter and score candidates
-    scored_candidates: list[tuple[Tag, str, int]] = []
+    scored_candidates: list[tuple[Node, str, int, list[str]]] = []  # (element, reason, score, links)
     
-    for element, reason, _ in candidates:
-        element_text = element.get_text(separator=' ', strip=True).lower()
+    for element, reason, strategy_index in candidates:
+        has_on_this_page, has_navigation = scan_text_flags(element)
         
         # EXCLUDE candidates containing "on this page" (likely TOC)
-        if 'on this page' in element_text:
+        if has_on_this_page:
             if verbose:
                 print(f"[DEBUG] Excluding candidate ({reason}): contains 'on this page'")
             continue
@@ -156,29 +386,36 @@ def find_sidebar_container(soup: BeautifulSoup, base_url: str, target_origin: st
         score = 0
         
         # Prefer candidates containing "Navigation" text
-        if 'navigation' in element_text:
+        if has_navigation:
             score += 100
         
         # Add score based on number of internal links
-        link_count = count_internal_links(element, base_url, target_origin)
+        links = collect_internal_links(element, base_url, target_netloc)
+        link_count = len(links)
         score += link_count
         
-        scored_candidates.append((element, reason, score))
+        scored_candidates.append((element, reason, score, links))
         
         if verbose:
             print(f"[DEBUG] Candidate ({reason}): score={score}, internal_links={link_count}")
+        
+        # Only the most specific selector is trusted to end the search early
+        if strategy_index == 0 and has_navigation and link_count >= HIGH_CONFIDENCE_MIN_LINKS:
+            if verbose:
+                print(f"[INFO] Selected sidebar: {reason} (score: {score}, high confidence)")
+            return element, links
     
     if not scored_candidates:
         return None
     
     # Sort by score descending and pick the best
     scored_candidates.sort(key=lambda x: x[2], reverse=True)
-    best_candidate, best_reason, best_score = scored_candidates[0]
+    best_candidate, best_reason, best_score, best_links = scored_candidates[0]
     
     if verbose:
         print(f"[INFO] Selected sidebar: {best_reason} (score: {best_score})")
     
-    return best_candidate
+    return best_candidate, best_links
 
 
 def extract_sidebar_links(
@@ -192,9 +429,13 @@ def extract_sidebar_links(
     Returns:
         0 on success, non-zero on failure
     """
+    # Sidebars repeat hrefs across candidates, so normalize_url is memoized; start each run empty
+    normalize_url.cache_clear()
+    
     # Parse target origin from start URL
     parsed_start = urlparse(start_url)
-    target_origin = f"{parsed_start.scheme}://{parsed_start.netloc}"
+    target_netloc = parsed_start.netloc
+    target_origin = f"{parsed_start.scheme}://{target_netloc}"
     
     if verbose:
         print(f"[INFO] Fetching: {start_url}")
@@ -202,12 +443,9 @@ def extract_sidebar_links(
     
     # Fetch the page
     try:
-        response = requests.get(
-            start_url,
-            headers={'User-Agent': USER_AGENT},
-            timeout=REQUEST_TIMEOUT
-        )
+        response = SESSION.get(start_url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
+        html = response.content
     except requests.exceptions.Timeout:
         print(f"[ERROR] Request timed out while fetching {start_url}", file=sys.stderr)
         print("[ACTION] Check your internet connection or try again later.", file=sys.stderr)
@@ -225,28 +463,26 @@ def extract_sidebar_links(
         return 1
     
     if verbose:
-        print(f"[INFO] Received {len(response.content)} bytes, status: {response.status_code}")
+        print(f"[INFO] Received {len(html)} bytes, status: {response.status_code}")
     
-    # Parse HTML
-    soup = BeautifulSoup(response.content, 'html.parser')
+    # Parse HTML (decoded with the header's charset if declared, else raw bytes for the parser to detect)
+    document = parse_html(decode_body(html, declared_charset(response.headers)))
     
     # Find sidebar container
-    sidebar = find_sidebar_container(soup, start_url, target_origin, verbose)
+    sidebar = find_sidebar_container(document, start_url, target_netloc, verbose)
     
     if sidebar is None:
         print("[ERROR] Could not find a suitable sidebar navigation container.", file=sys.stderr)
         print("[ACTION] The page structure may not match expected patterns. Check if the URL is correct.", file=sys.stderr)
         return 1
     
-    # Extract links from sidebar
+    # De-duplicate the links already normalized while scoring the sidebar
+    _, sidebar_links = sidebar
     seen_urls: set[str] = set()
     unique_links: list[str] = []  # Preserve first-seen order
     
-    for a_tag in sidebar.find_all('a', href=True):
-        href = a_tag.get('href', '')
-        normalized = normalize_url(href, start_url, target_origin)
-        
-        if normalized and normalized not in seen_urls:
+    for normalized in sidebar_links:
+        if normalized not in seen_urls:
             seen_urls.add(normalized)
             unique_links.append(normalized)
     
@@ -261,8 +497,9 @@ def extract_sidebar_links(
     # Write to output file
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
-            for link in unique_links:
-                f.write(f"{link}\n")
+            # One write for the whole payload instead of one per link
+            if unique_links:
+                f.write('\n'.join(unique_links) + '\n')
         
         if verbose:
             print(f"[INFO] Wrote {len(unique_links)} links to {output_file}")
@@ -12,6 +12,8 @@ Usage:
   python script/scrape_links.py https://example.com output/links.txt --scope all
   python script/scrape_links.py https://example.com output/links.txt --scope internal --verbose
   python script/scrape_links.py https://example.com output/links.txt --js  # For JS-rendered pages
+  python script/scrape_links.py --urls-file urls.txt --out-dir output/  # Batch mode, one output file per URL
+  python script/scrape_links.py https://example.com output/links.json --format json --include-text
 
 Scope Options:
   - 'all'      : Extract all hyperlinks (internal + external)
@@ -23,14 +25,63 @@ Author: Hyperlink Harvester
 """
 
 import argparse
+import asyncio
+import functools
+import hashlib
+import json
 import os
+import re
 import sys
-import time
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Union
 from urllib.parse import urljoin, urlparse, urlunparse
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Prefer the C-backed lxml parser; fall back to the pure-Python parser if lxml is not installed
+try:
+    import lxml  # noqa: F401
+    BS4_PARSER = 'lxml'
+except ImportError:
+    BS4_PARSER = 'html.parser'
+
+# Optional: selectolax (Lexbor engine) for C-level parsing and traversal; BeautifulSoup is the fallback
+SELECTOLAX_AVAILABLE = False
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional: httpx for concurrent fetching in batch mode (--urls-file)
+HTTPX_AVAILABLE = False
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional: h2 enables HTTP/2 multiplexing in httpx (pip install httpx[http2])
+HTTP2_AVAILABLE = False
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional: orjson for fast JSON output (--format json); the json module is the fallback
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
 
 # Optional: Selenium for JavaScript-rendered pages
 SELENIUM_AVAILABLE = False
@@ -41,6 +92,7 @@ try:
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
     SELENIUM_AVAILABLE = True
 except ImportError:
     pass
@@ -49,8 +101,81 @@ except ImportError:
 # Constants
 USER_AGENT = "HyperlinkHarvester/1.0 (Python link scraper tool)"
 REQUEST_TIMEOUT = (10, 30)  # (connect timeout, read timeout)
+URL_CACHE_SIZE = 4096  # Max memoized normalize_url results per run
+
+# Common-case absolute href: scheme, netloc, path, ?query, #fragment. Whitespace/control
+# characters and ';params' are left to urljoin/urlparse, which treat them specially.
+ABSOLUTE_URL_PATTERN = re.compile(r'^(https?)://([^/?#\x00-\x20]+)(/[^?#;\x00-\x20]*)?(\?[^#\x00-\x20]*)?(#[^\x00-\x20]*)?$')
+
+# Sidebar-like containers: these tags with an id/class containing one of these substrings
+SIDEBAR_TAGS = ('nav', 'aside', 'div', 'ul')
+SIDEBAR_PATTERNS = ('sidebar', 'sidenav', 'site-nav')
+# Single case-insensitive selector group so the parser's selector engine does the filtering
+SIDEBAR_PATTERN_SELECTOR = ', '.join(
+    f'{tag}[{attr}*="{pattern}" i]'
+    for tag in SIDEBAR_TAGS
+    for attr in ('id', 'class')
+    for pattern in SIDEBAR_PATTERNS
+)
+
+# Known sidebar selectors in priority order: (selector, description)
+SELECTOR_STRATEGIES = [
+    ('nav[aria-label="Navigation"]', 'nav with aria-label="Navigation"'),
+    ('nav[aria-label*="navigation" i]', 'nav with aria-label containing navigation'),
+    ('nav[role="navigation"]', 'nav with role="navigation"'),
+    ('aside nav', 'nav inside aside element'),
+    ('.sidebar nav', 'nav inside .sidebar'),
+    ('#sidebar nav', 'nav inside #sidebar'),
+]
+
+# A candidate matching the first (most specific) selector strategy, labelled "Navigation" and
+# with at least this many internal links, is accepted immediately without scoring the rest
+HIGH_CONFIDENCE_MIN_LINKS = 10
+
+# Every strategy plus the id/class patterns as one selector group (see select_sidebar_candidates)
+CANDIDATE_SELECTOR = ', '.join([selector for selector, _ in SELECTOR_STRATEGIES] + [SIDEBAR_PATTERN_SELECTOR])
+
+# TOC markers (group 1) or "navigation" label (group 2), matched case-insensitively in one pass
+# "navigation" leaves its final "on" unconsumed so "...navigation this page" still finds the TOC marker
+TEXT_FLAG_PATTERN = re.compile(r'(on this page|table of contents)|(navigati(?=on))', re.IGNORECASE)
+# Longest text TEXT_FLAG_PATTERN matches; scan_text_flags() carries this much across text nodes
+TEXT_FLAG_MAX_LENGTH = len('table of contents')
+
+BATCH_MAX_CONCURRENCY = 20  # Maximum in-flight requests in batch mode (httpx)
+BATCH_MAX_WORKERS = 16  # Fetch threads in batch mode when httpx is not installed
+PER_HOST_CONCURRENCY = 4  # Maximum in-flight requests to any single host in batch mode
+HTTP_CACHE_DIRNAME = '.http_cache'  # Created next to the output file(s) when --cache is used
+
+# A parsed element from whichever backend is active (selectolax LexborNode or bs4 Tag)
+Node = Any
+
+
+def create_session() -> requests.Session:
+    """Create an HTTP session with connection pooling and retries on transient server errors."""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    # Advertise every compression scheme urllib3 can decode (br/zstd only when brotli/zstandard are installed)
+    session.headers.update(make_headers(accept_encoding=True))
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=100,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False  # Hand the final response back so raise_for_status() reports it
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
+# Shared session so repeated fetches reuse TCP/TLS connections (HTTP keep-alive)
+SESSION = create_session()
+
+
+@functools.lru_cache(maxsize=URL_CACHE_SIZE)
 def normalize_url(href: str, base_url: str, strip_fragments: bool = True) -> Optional[str]:
     """
     Normalize a URL:
@@ -69,6 +194,19 @@ def normalize_url(href: str, base_url: str, strip_fragments: bool = True) -> Opt
     if href.startswith('#'):
         return None
     
+    # Fast path: plain absolute URLs are normalized with string ops (same result as below)
+    match = ABSOLUTE_URL_PATTERN.match(href)
+    if match:
+        scheme, netloc, path, query, fragment = match.groups()
+        path = path or ''
+        path = path.rstrip('/') if path != '/' else '/'
+        normalized = f"{scheme}://{netloc}{path}"
+        if query and query != '?':
+            normalized += query
+        if fragment and fragment != '#' and not strip_fragments:
+            normalized += fragment
+        return normalized
+    
     # Resolve relative URL against base
     absolute_url = urljoin(base_url, href)
     
@@ -91,58 +229,209 @@ def normalize_url(href: str, base_url: str, strip_fragments: bool = True) -> Opt
     return normalized
 
 
-def is_internal_url(url: str, base_url: str) -> bool:
-    """Check if a URL is on the same domain as the base URL."""
-    parsed_url = urlparse(url)
-    parsed_base = urlparse(base_url)
-    return parsed_url.netloc == parsed_base.netloc
+def is_internal_url(url: str, target_netloc: str) -> bool:
+    """Check if a normalized URL is on the target domain (target_netloc is computed once per page)."""
+    # Normalized URLs are always "scheme://netloc[/path][?query][#fragment]",
+    # so slice the netloc out directly instead of running urlparse per link
+    netloc = url.split('/', 3)[2]
+    return netloc.partition('?')[0].partition('#')[0] == target_netloc
+
+
+def declared_charset(headers: Any) -> Optional[str]:
+    """Return the charset named in a response's Content-Type header, or None if it names none."""
+    # get_encoding_from_headers() falls back to ISO-8859-1 for any text/* type, which
+    # would override a page's own <meta charset>, so only trust an explicit charset
+    if 'charset' not in (headers.get('content-type') or '').lower():
+        return None
+    return requests.utils.get_encoding_from_headers(headers)
+
+
+def decode_body(body: bytes, charset: Optional[str]) -> Union[str, bytes]:
+    """
+    Decode a response body with its declared charset.
+    
+    Neither parser sees the HTTP header, so a declared charset is applied here. Without one
+    (or with an unknown one) the raw bytes are returned and parse_html() has the parser
+    detect the encoding from the BOM or <meta charset>.
+    """
+    if charset:
+        try:
+            return body.decode(charset, errors='replace')
+        except LookupError:
+            pass
+    return body
+
+
+def parse_html(html: Union[str, bytes], links_only: bool = False) -> Node:
+    """
+    Parse HTML with selectolax if installed, otherwise with BeautifulSoup.
+    
+    With links_only, the BeautifulSoup fallback only builds <a href> elements (and their
+    contents), skipping Python objects for the rest of the page. selectolax always parses
+    the full document in C, which is already cheaper.
+    """
+    if SELECTOLAX_AVAILABLE:
+        # Lexbor reads bytes as UTF-8 unless asked to detect the encoding (BOM / <meta charset>)
+        document = LexborHTMLParser(html, encoding=isinstance(html, bytes))
+        # text() includes <script>/<style> contents, which bs4's get_text() skips; drop them
+        # so both backends score and label links from the same text
+        document.strip_tags(['script', 'style'], recursive=True)
+        return document
+    if links_only:
+        return BeautifulSoup(html, BS4_PARSER, parse_only=SoupStrainer('a', href=True))
+    return BeautifulSoup(html, BS4_PARSER)
+
+
+def get_attribute(node: Node, name: str) -> str:
+    """Return an attribute value as a string ('' if missing, multi-valued attributes space-joined)."""
+    if SELECTOLAX_AVAILABLE:
+        return node.attributes.get(name) or ''
+    value = node.get(name, '')
+    return ' '.join(value) if isinstance(value, list) else (value or '')
+
+
+def get_text(node: Node, separator: str = '') -> str:
+    """Return the stripped text content of a node."""
+    if SELECTOLAX_AVAILABLE:
+        return node.text(separator=separator, strip=True)
+    return node.get_text(separator=separator, strip=True)
+
+
+def node_key(node: Node) -> int:
+    """Return a stable identity for a node (selectolax creates a new wrapper object per query)."""
+    if SELECTOLAX_AVAILABLE:
+        return node.mem_id
+    return id(node)
+
+
+def scan_text_flags(element: Node) -> tuple[bool, bool]:
+    """
+    Scan an element's text for TOC markers ("on this page", "table of contents") and "navigation".
+    
+    Returns (has_toc_marker, has_navigation). Stops at the first TOC marker, since
+    those candidates are excluded anyway.
+    """
+    if SELECTOLAX_AVAILABLE:
+        # Lexbor joins the text in C, which beats walking text nodes from Python. It keeps a
+        # separator for whitespace-only nodes ("on this  page"), so join on NUL (never in
+        # parsed text) and drop the empty pieces to match bs4's space-joined text
+        # (skip_empty=True only skips ASCII whitespace, so an &nbsp; node would still split it)
+        pieces = element.text(separator='\x00', strip=True).split('\x00')
+        strings = (' '.join(filter(None, pieces)),)
+    else:
+        # Walk text nodes lazily instead of building the whole subtree's text first
+        strings = element.stripped_strings
+    
+    has_navigation = False
+    tail = ''
+    for text in strings:
+        # Prefix the end of the previous string so a marker split across text nodes
+        # (e.g. "On <b>this</b> page") matches as it would in the space-joined text
+        if tail:
+            text = f'{tail} {text}'
+        for match in TEXT_FLAG_PATTERN.finditer(text):
+            if match.group(1):
+                return True, has_navigation
+            has_navigation = True
+        tail = text[-TEXT_FLAG_MAX_LENGTH:]
+    return False, has_navigation
+
+
+def select_sidebar_candidates(document: Node) -> tuple[list[list[Node]], list[Node]]:
+    """
+    Find sidebar candidates for every selector strategy and id/class pattern.
+    
+    Returns (matches per SELECTOR_STRATEGIES entry, id/class pattern matches), each in
+    document order. A node is listed once, under the first strategy it satisfies.
+    
+    With BeautifulSoup each select() is a Python-level walk of the whole document, so the
+    selectors run as one group and each match is classified with css.match(). Lexbor walks
+    in C (and its css_matches() tests a node's subtree, not the node), so it keeps one
+    query per selector.
+    """
+    strategy_matches: list[list[Node]] = [[] for _ in SELECTOR_STRATEGIES]
+    pattern_matches: list[Node] = []
+    seen_ids: set[int] = set()  # node_key() of every candidate, for O(1) duplicate checks
+    
+    if SELECTOLAX_AVAILABLE:
+        for index, (selector, _) in enumerate(SELECTOR_STRATEGIES):
+            try:
+                nodes = document.css(selector)
+            except Exception:
+                continue
+            for node in nodes:
+                if node_key(node) not in seen_ids:
+                    seen_ids.add(node_key(node))
+                    strategy_matches[index].append(node)
+        # Lexbor may return a node once per selector it matches in the group
+        for node in document.css(SIDEBAR_PATTERN_SELECTOR):
+            if node_key(node) not in seen_ids:
+                seen_ids.add(node_key(node))
+                pattern_matches.append(node)
+        return strategy_matches, pattern_matches
+    
+    for node in document.select(CANDIDATE_SELECTOR):
+        for index, (selector, _) in enumerate(SELECTOR_STRATEGIES):
+            if node.css.match(selector):
+                strategy_matches[index].append(node)
+                break
+        else:
+            pattern_matches.append(node)
+    return strategy_matches, pattern_matches
+
+
+def find_links(node: Node) -> list[tuple[Node, str]]:
+    """Return (<a> element, href) for every <a href> under a node, in document order."""
+    # The selector/href=True filter guarantees the attribute, so index it directly
+    # (selectolax's lazy attrs avoids building a dict of every attribute)
+    if SELECTOLAX_AVAILABLE:
+        return [(a_tag, a_tag.attrs['href']) for a_tag in node.css('a[href]')]
+    return [(a_tag, a_tag['href']) for a_tag in node.find_all('a', href=True)]
 
 
-def count_internal_links(element: Tag, base_url: str) -> int:
-    """Count internal links within an element."""
-    count = 0
-    for a_tag in element.find_all('a', href=True):
-        href = a_tag.get('href', '')
+def collect_internal_links(element: Node, base_url: str, target_netloc: str) -> list[tuple[str, Node]]:
+    """
+    Collect internal links within an element as (normalized URL, <a> element) pairs, in DOM order.
+    
+    Duplicates are kept so len() matches the link count used for scoring.
+    """
+    links: list[tuple[str, Node]] = []
+    for a_tag, href in find_links(element):
         normalized = normalize_url(href, base_url)
-        if normalized and is_internal_url(normalized, base_url):
-            count += 1
-    return count
+        if normalized and is_internal_url(normalized, target_netloc):
+            links.append((normalized, a_tag))
+    return links
 
 
-def find_sidebar_container(soup: BeautifulSoup, base_url: str, verbose: bool = False) -> Optional[Tag]:
+def find_sidebar_container(
+    document: Node,
+    base_url: str,
+    target_netloc: str,
+    verbose: bool = False
+) -> Optional[tuple[Node, list[tuple[str, Node]]]]:
     """
     Find the primary sidebar navigation container using heuristics.
-    """
-    candidates: list[tuple[Tag, str, int]] = []
     
-    # Selector strategies in priority order
-    selector_strategies = [
-        ('nav[aria-label="Navigation"]', 'nav with aria-label="Navigation"'),
-        ('nav[aria-label*="navigation" i]', 'nav with aria-label containing navigation'),
-        ('nav[role="navigation"]', 'nav with role="navigation"'),
-        ('aside nav', 'nav inside aside element'),
-        ('.sidebar nav', 'nav inside .sidebar'),
-        ('#sidebar nav', 'nav inside #sidebar'),
-    ]
+    A candidate matching SELECTOR_STRATEGIES[0] with "Navigation" text and at least
+    HIGH_CONFIDENCE_MIN_LINKS internal links is returned as soon as it is scored. Generic
+    selectors (e.g. nav[role="navigation"]) also match header navbars, so they are always scored.
+    
+    Returns:
+        (container, internal links collected while scoring it), or None if no sidebar was found
+    """
+    candidates: list[tuple[Node, str, Optional[int]]] = []  # (element, reason, SELECTOR_STRATEGIES index)
+    strategy_matches, pattern_matches = select_sidebar_candidates(document)
     
     # Try CSS selectors first
-    for selector, description in selector_strategies:
-        try:
-            elements = soup.select(selector)
-            for el in elements:
-                candidates.append((el, description, 0))
-        except Exception:
-            continue
+    for index, ((_, description), elements) in enumerate(zip(SELECTOR_STRATEGIES, strategy_matches)):
+        for el in elements:
+            candidates.append((el, description, index))
     
-    # Try id/class containing "sidebar" or "nav" patterns
-    for tag in soup.find_all(['nav', 'aside', 'div', 'ul']):
-        tag_id = tag.get('id', '') or ''
-        tag_class = ' '.join(tag.get('class', []))
-        combined = f"{tag_id} {tag_class}".lower()
-        
-        if 'sidebar' in combined or 'sidenav' in combined or 'site-nav' in combined:
-            if tag not in [c[0] for c in candidates]:
-                candidates.append((tag, f'element with sidebar/nav pattern: {tag_id or tag_class[:50]}', 0))
+    # Then id/class containing "sidebar" or "nav" patterns
+    for tag in pattern_matches:
+        tag_id = get_attribute(tag, 'id')
+        tag_class = get_attribute(tag, 'class')
+        candidates.append((tag, f'element with sidebar/nav pattern: {tag_id or tag_class[:50]}', None))
     
     if not candidates:
         return None
@@ -151,13 +440,13 @@ def find_sidebar_container(soup: BeautifulSoup, base_url: str, verbose: bool = F
         print(f"[DEBUG] Found {len(candidates)} sidebar candidates")
     
     # Filter and score candidates
-    scored_candidates: list[tuple[Tag, str, int]] = []
+    scored_candidates: list[tuple[Node, str, int, list[tuple[str, Node]]]] = []  # (element, reason, score, links)
     
-    for element, reason, _ in candidates:
-        element_text = element.get_text(separator=' ', strip=True).lower()
+    for element, reason, strategy_index in candidates:
+        has_toc_marker, has_navigation = scan_text_flags(element)
         
         # EXCLUDE candidates containing "on this page" (likely TOC)
-        if 'on this page' in element_text or 'table of contents' in element_text:
+        if has_toc_marker:
             if verbose:
                 print(f"[DEBUG] Excluding candidate ({reason}): contains TOC text")
             continue
@@ -165,32 +454,139 @@ def find_sidebar_container(soup: BeautifulSoup, base_url: str, verbose: bool = F
         score = 0
         
         # Prefer candidates containing "Navigation" text
-        if 'navigation' in element_text:
+        if has_navigation:
             score += 100
         
         # Add score based on number of internal links
-        link_count = count_internal_links(element, base_url)
+        links = collect_internal_links(element, base_url, target_netloc)
+        link_count = len(links)
         score += link_count
         
-        scored_candidates.append((element, reason, score))
+        scored_candidates.append((element, reason, score, links))
         
         if verbose:
             print(f"[DEBUG] Candidate ({reason}): score={score}, links={link_count}")
+        
+        # Only the most specific selector is trusted to end the search early
+        if strategy_index == 0 and has_navigation and link_count >= HIGH_CONFIDENCE_MIN_LINKS:
+            if verbose:
+                print(f"[INFO] Selected sidebar: {reason} (score: {score}, high confidence)")
+            return element, links
     
     if not scored_candidates:
         return None
     
     # Sort by score descending and pick the best
     scored_candidates.sort(key=lambda x: x[2], reverse=True)
-    best_candidate, best_reason, best_score = scored_candidates[0]
+    best_candidate, best_reason, best_score, best_links = scored_candidates[0]
     
     if verbose:
         print(f"[INFO] Selected sidebar: {best_reason} (score: {best_score})")
     
-    return best_candidate
+    return best_candidate, best_links
+
+
+def http_cache_paths(cache_dir: str, url: str) -> tuple[str, str]:
+    """Return the (validators JSON, body) file paths for a URL in the HTTP cache."""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f'{key}.json'), os.path.join(cache_dir, f'{key}.html')
+
+
+def load_cached_page(cache_dir: str, url: str) -> Optional[tuple[dict, bytes]]:
+    """Return (validators and charset, body) for a cached URL, or None if it is not cached."""
+    meta_path, body_path = http_cache_paths(cache_dir, url)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            validators = json.load(f)
+        with open(body_path, 'rb') as f:
+            return validators, f.read()
+    except (IOError, ValueError):
+        return None
+
+
+def conditional_headers(cached: Optional[tuple[dict, bytes]]) -> dict[str, str]:
+    """Build If-None-Match/If-Modified-Since headers from a cached page's validators."""
+    headers: dict[str, str] = {}
+    if cached is None:
+        return headers
+    validators, _ = cached
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def store_cached_page(cache_dir: str, url: str, response_headers: Any, body: bytes) -> None:
+    """
+    Cache a page body with its ETag/Last-Modified validators (skipped if the server sent neither).
+    
+    The declared charset is kept too, since a 304 response need not repeat Content-Type.
+    """
+    validators = {
+        'url': url,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified'),
+        'charset': declared_charset(response_headers),
+    }
+    if not validators['etag'] and not validators['last_modified']:
+        return
+    
+    meta_path, body_path = http_cache_paths(cache_dir, url)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(body_path, 'wb') as f:
+            f.write(body)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(validators, f)
+    except IOError as e:
+        print(f"[INFO] Could not update HTTP cache for {url}: {e}", file=sys.stderr)
+
 
+def create_chrome_driver() -> Any:
+    """Start a headless Chrome WebDriver."""
+    options = ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument(f'--user-agent={USER_AGENT}')
+    return webdriver.Chrome(options=options)
 
-def fetch_page_html(url: str, use_js: bool = False, verbose: bool = False, wait_time: int = 3) -> Optional[str]:
+
+@contextmanager
+def browser_session() -> Iterator[Optional[Any]]:
+    """
+    Yield one headless Chrome driver to reuse across fetch_page_html() calls.
+    
+    Starting Chrome is the most expensive step of a --js fetch, so batch runs pay it once.
+    Yields None if Selenium is not installed or Chrome fails to start; fetch_page_html()
+    then handles each page on its own as usual.
+    """
+    if not SELENIUM_AVAILABLE:
+        yield None
+        return
+    
+    try:
+        driver = create_chrome_driver()
+    except Exception as e:
+        print(f"[ERROR] Selenium failed to start Chrome: {e}", file=sys.stderr)
+        yield None
+        return
+    
+    try:
+        yield driver
+    finally:
+        driver.quit()
+
+
+def fetch_page_html(
+    url: str,
+    use_js: bool = False,
+    verbose: bool = False,
+    wait_time: int = 3,
+    cache_dir: Optional[str] = None,
+    driver: Optional[Any] = None
+) -> Optional[Union[str, bytes]]:
     """
     Fetch page HTML, optionally using Selenium for JavaScript-rendered pages.
     
@@ -198,10 +594,15 @@ def fetch_page_html(url: str, use_js: bool = False, verbose: bool = False, wait_
         url: The URL to fetch
         use_js: Use Selenium for JavaScript rendering
         verbose: Print debug information
-        wait_time: Seconds to wait for JS rendering
+        wait_time: Maximum seconds to wait for links to appear during JS rendering
+        cache_dir: Directory for the HTTP cache; when set, a cached copy is revalidated
+            with a conditional GET and reused on 304 Not Modified
+        driver: Existing WebDriver to reuse (see browser_session()); a new one is
+            started and quit for this page if omitted
     
     Returns:
-        HTML content as string, or None on failure
+        HTML content (string from Selenium or when HTTP declares a charset, otherwise raw bytes),
+        or None on failure
     """
     if use_js:
         if not SELENIUM_AVAILABLE:
@@ -213,20 +614,25 @@ def fetch_page_html(url: str, use_js: bool = False, verbose: bool = False, wait_
                 if verbose:
                     print(f"[INFO] Using Selenium for JavaScript rendering...")
                 
-                options = ChromeOptions()
-                options.add_argument('--headless')
-                options.add_argument('--no-sandbox')
-                options.add_argument('--disable-dev-shm-usage')
-                options.add_argument(f'--user-agent={USER_AGENT}')
-                
-                driver = webdriver.Chrome(options=options)
-                driver.get(url)
+                own_driver = driver is None
+                if own_driver:
+                    driver = create_chrome_driver()
                 
-                # Wait for page to load
-                time.sleep(wait_time)
-                
-                html = driver.page_source
-                driver.quit()
+                try:
+                    driver.get(url)
+                    
+                    # Wait until links are rendered, up to wait_time seconds
+                    try:
+                        WebDriverWait(driver, wait_time).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href]'))
+                        )
+                    except TimeoutException:
+                        pass  # No links yet; use whatever has rendered
+                    
+                    html = driver.page_source
+                finally:
+                    if own_driver:
+                        driver.quit()
                 
                 if verbose:
                     print(f"[INFO] Received {len(html)} bytes via Selenium")
@@ -237,20 +643,30 @@ def fetch_page_html(url: str, use_js: bool = False, verbose: bool = False, wait_
                 print("[INFO] Falling back to standard HTTP request...", file=sys.stderr)
                 use_js = False
     
-    # Standard HTTP request
+    # Standard HTTP request (conditional if we have a cached copy)
+    cached = load_cached_page(cache_dir, url) if cache_dir else None
     try:
-        response = requests.get(
+        response = SESSION.get(
             url,
-            headers={'User-Agent': USER_AGENT},
+            headers=conditional_headers(cached),
             timeout=REQUEST_TIMEOUT,
             allow_redirects=True
         )
+        if response.status_code == 304 and cached is not None:
+            if verbose:
+                print("[INFO] Not modified (304), using cached copy")
+            return decode_body(cached[1], cached[0].get('charset'))
+        
         response.raise_for_status()
+        html = response.content
         
         if verbose:
-            print(f"[INFO] Received {len(response.content)} bytes, status: {response.status_code}")
+            print(f"[INFO] Received {len(html)} bytes, status: {response.status_code}")
+        
+        if cache_dir:
+            store_cached_page(cache_dir, url, response.headers, html)
         
-        return response.text
+        return decode_body(html, declared_charset(response.headers))
     except requests.exceptions.Timeout:
         print(f"[ERROR] Request timed out while fetching {url}", file=sys.stderr)
         return None
@@ -272,7 +688,10 @@ def scrape_links(
     verbose: bool = False,
     include_text: bool = False,
     use_js: bool = False,
-    wait_time: int = 3
+    wait_time: int = 3,
+    use_cache: bool = False,
+    driver: Optional[Any] = None,
+    output_format: str = 'text'
 ) -> int:
     """
     Main scraping function.
@@ -284,7 +703,11 @@ def scrape_links(
         verbose: Print detailed progress information
         include_text: Include link text in output (format: URL | Text)
         use_js: Use Selenium for JavaScript-rendered pages
-        wait_time: Seconds to wait for JS rendering
+        wait_time: Maximum seconds to wait for JS rendering
+        use_cache: Cache the page next to the output file and revalidate it with conditional GET
+        driver: Existing WebDriver to reuse for use_js (see browser_session())
+        output_format: 'text' (one link per line) or 'json' (list of {"url"} objects, plus
+            "text" with include_text)
     
     Returns:
         0 on success, non-zero on failure
@@ -294,51 +717,89 @@ def scrape_links(
         print(f"[INFO] Scope: {scope}")
         print(f"[INFO] Output: {output_file}")
         if use_js:
-            print(f"[INFO] JavaScript rendering: enabled (wait: {wait_time}s)")
+            print(f"[INFO] JavaScript rendering: enabled (max wait: {wait_time}s)")
     
     # Fetch the page
-    html = fetch_page_html(url, use_js=use_js, verbose=verbose, wait_time=wait_time)
+    cache_dir = os.path.join(os.path.dirname(output_file), HTTP_CACHE_DIRNAME) if use_cache else None
+    html = fetch_page_html(url, use_js=use_js, verbose=verbose, wait_time=wait_time,
+                           cache_dir=cache_dir, driver=driver)
     if html is None:
         return 1
     
-    # Parse HTML
-    soup = BeautifulSoup(html, 'html.parser')
+    return scrape_html(html, url, output_file, scope=scope, verbose=verbose, include_text=include_text,
+                       output_format=output_format)
+
+
+def scrape_html(
+    html: Union[str, bytes],
+    url: str,
+    output_file: str,
+    scope: str = 'all',
+    verbose: bool = False,
+    include_text: bool = False,
+    output_format: str = 'text'
+) -> int:
+    """
+    Extract links from already-fetched HTML and write them to the output file.
+    
+    Args:
+        html: Page content (bytes or string)
+        url: The URL the page was fetched from (used to resolve relative links)
+        output_file: Path to the output file
+        scope: 'all', 'internal', 'external', or 'sidebar'
+        verbose: Print detailed progress information
+        include_text: Include link text in output (format: URL | Text)
+        output_format: 'text' (one link per line) or 'json' (list of {"url"} objects, plus
+            "text" with include_text)
+    
+    Returns:
+        0 on success, non-zero on failure
+    """
+    # Candidates repeat hrefs, so normalize_url is memoized; start each page with an empty cache
+    normalize_url.cache_clear()
     
-    # Determine the search container
+    # Parse HTML (only the sidebar scope needs the full tree)
+    document = parse_html(html, links_only=(scope != 'sidebar'))
+    
+    # The page's host is constant for the whole scrape, so parse it once
+    target_netloc = urlparse(url).netloc
+    
+    # Collect candidate links as (normalized URL, <a> element) pairs
     if scope == 'sidebar':
-        container = find_sidebar_container(soup, url, verbose)
-        if container is None:
+        sidebar = find_sidebar_container(document, url, target_netloc, verbose)
+        if sidebar is None:
             print("[ERROR] Could not find a sidebar navigation container.", file=sys.stderr)
             return 1
+        # Sidebar scoring already normalized and filtered the winner's internal links
+        _, links = sidebar
     else:
-        container = soup
+        links = []
+        for a_tag, href in find_links(document):
+            normalized = normalize_url(href, url)
+            
+            if not normalized:
+                continue
+            
+            # Apply scope filter
+            is_internal = is_internal_url(normalized, target_netloc)
+            
+            if scope == 'internal' and not is_internal:
+                continue
+            if scope == 'external' and is_internal:
+                continue
+            # scope == 'all' includes everything
+            
+            links.append((normalized, a_tag))
     
     # Extract links
     seen_urls: set[str] = set()
     results: list[tuple[str, str]] = []  # (url, text)
     
-    for a_tag in container.find_all('a', href=True):
-        href = a_tag.get('href', '')
-        normalized = normalize_url(href, url)
-        
-        if not normalized:
-            continue
-        
-        # Apply scope filter
-        is_internal = is_internal_url(normalized, url)
-        
-        if scope == 'internal' or scope == 'sidebar':
-            if not is_internal:
-                continue
-        elif scope == 'external':
-            if is_internal:
-                continue
-        # scope == 'all' includes everything
-        
+    for normalized, a_tag in links:
         # De-duplicate
         if normalized not in seen_urls:
             seen_urls.add(normalized)
-            link_text = a_tag.get_text(strip=True) if include_text else ''
+            link_text = get_text(a_tag) if include_text else ''
             results.append((normalized, link_text))
     
     if verbose:
@@ -351,12 +812,14 @@ def scrape_links(
     
     # Write to output file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for link, text in results:
-                if include_text and text:
-                    f.write(f"{link} | {text}\n")
-                else:
-                    f.write(f"{link}\n")
+        if output_format == 'json':
+            write_json_output(output_file, results, include_text)
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                # One write for the whole payload instead of one per link
+                lines = [f"{link} | {text}" if include_text and text else link for link, text in results]
+                if lines:
+                    f.write('\n'.join(lines) + '\n')
         
         print(f"✓ Extracted {len(results)} links to {output_file}")
             
@@ -367,6 +830,197 @@ def scrape_links(
     return 0
 
 
+def write_json_output(output_file: str, results: list[tuple[str, str]], include_text: bool) -> None:
+    """Write links as a JSON list of {"url": ...} objects ({"url", "text"} with include_text)."""
+    payload = [{'url': link, 'text': text} if include_text else {'url': link} for link, text in results]
+    
+    if ORJSON_AVAILABLE:
+        # orjson serializes straight to UTF-8 bytes
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+
+def read_urls_file(path: str) -> list[str]:
+    """Read URLs from a file, one per line, skipping blank lines and '#' comments."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def output_path_for(url: str, output_dir: str, extension: str = 'txt') -> str:
+    """
+    Derive a per-URL output file path, e.g. docs.example.com_guide_intro_1a2b3c4d.txt.
+    
+    The readable part drops the query string and folds punctuation to '_', so a short hash
+    of the full URL keeps e.g. page.html vs page.html?v=2 (or /a/b vs /a_b) from colliding.
+    """
+    parsed = urlparse(url)
+    name = re.sub(r'[^A-Za-z0-9._-]+', '_', f"{parsed.netloc}{parsed.path}").strip('_')
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(output_dir, f"{name or 'index'}_{digest}.{extension}")
+
+
+async def fetch_pages_async(
+    urls: list[str],
+    verbose: bool = False,
+    cache_dir: Optional[str] = None
+) -> list[Optional[Union[str, bytes]]]:
+    """
+    Fetch many pages concurrently over one pooled httpx client.
+    
+    Connections are kept alive and, when h2 is installed, multiplexed over HTTP/2.
+    With cache_dir, cached pages are revalidated with conditional GET as in fetch_page_html().
+    
+    Returns:
+        Page content for each URL (same order as urls, decoded if a charset is declared),
+        None for failed fetches
+    """
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    host_limits = {host: asyncio.Semaphore(PER_HOST_CONCURRENCY) for host in {urlparse(url).netloc for url in urls}}
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    timeout = httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0])
+    
+    async with httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=HTTP2_AVAILABLE,
+        follow_redirects=True,
+        headers={'User-Agent': USER_AGENT}
+    ) as client:
+        async def fetch(url: str) -> Optional[Union[str, bytes]]:
+            cached = load_cached_page(cache_dir, url) if cache_dir else None
+            async with semaphore, host_limits[urlparse(url).netloc]:
+                try:
+                    response = await client.get(url, headers=conditional_headers(cached))
+                    if response.status_code == 304 and cached is not None:
+                        if verbose:
+                            print(f"[INFO] Not modified (304), using cached copy of {url}")
+                        return decode_body(cached[1], cached[0].get('charset'))
+                    response.raise_for_status()
+                except (httpx.HTTPError, httpx.InvalidURL) as e:  # InvalidURL is not an HTTPError
+                    print(f"[ERROR] Failed to fetch {url}: {e}", file=sys.stderr)
+                    return None
+            
+            if verbose:
+                print(f"[INFO] Received {len(response.content)} bytes from {url}, status: {response.status_code}")
+            
+            if cache_dir:
+                store_cached_page(cache_dir, url, response.headers, response.content)
+            
+            return decode_body(response.content, response.charset_encoding)
+        
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
+
+def fetch_pages_threaded(
+    urls: list[str],
+    verbose: bool = False,
+    cache_dir: Optional[str] = None
+) -> list[Optional[Union[str, bytes]]]:
+    """
+    Fetch many pages concurrently with fetch_page_html() on a thread pool.
+    
+    Used for batch mode when httpx is not installed. requests releases the GIL while
+    waiting on the network, and all threads share SESSION's connection pool.
+    
+    Returns:
+        Page content for each URL (same order as urls, decoded if a charset is declared),
+        None for failed fetches
+    """
+    host_limits = {host: threading.Semaphore(PER_HOST_CONCURRENCY) for host in {urlparse(url).netloc for url in urls}}
+    
+    def fetch(url: str) -> Optional[Union[str, bytes]]:
+        with host_limits[urlparse(url).netloc]:
+            return fetch_page_html(url, verbose=verbose, cache_dir=cache_dir)
+    
+    with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+        return list(executor.map(fetch, urls))
+
+
+def scrape_batch(
+    urls_file: str,
+    output_dir: str,
+    scope: str = 'all',
+    verbose: bool = False,
+    include_text: bool = False,
+    use_js: bool = False,
+    wait_time: int = 3,
+    use_cache: bool = False,
+    output_format: str = 'text'
+) -> int:
+    """
+    Scrape every URL listed in a file, writing one output file per URL.
+    
+    Pages are fetched concurrently (httpx when installed, otherwise a thread pool),
+    with at most PER_HOST_CONCURRENCY requests in flight per host, then parsed in
+    order. With use_js each URL is scraped in turn, sharing one browser. Lines that
+    are not parseable URLs are reported and counted as failures.
+    
+    Returns:
+        0 if every URL succeeded, non-zero if any failed
+    """
+    try:
+        urls = read_urls_file(urls_file)
+    except IOError as e:
+        print(f"[ERROR] Failed to read {urls_file}: {e}", file=sys.stderr)
+        return 1
+    
+    if not urls:
+        print(f"[ERROR] No URLs found in {urls_file}", file=sys.stderr)
+        return 1
+    
+    if verbose:
+        print(f"[INFO] Batch mode: {len(urls)} URLs from {urls_file}")
+    
+    failures = 0
+    extension = 'json' if output_format == 'json' else 'txt'
+    
+    # urlparse() raises ValueError for lines like 'http://[::1' or 'http://host:abc/'; report
+    # them here so they can't abort building the per-host limits or the output file names
+    valid_urls: list[str] = []
+    for url in urls:
+        try:
+            urlparse(url).port
+        except ValueError as e:
+            print(f"[ERROR] Invalid URL {url}: {e}", file=sys.stderr)
+            failures += 1
+            continue
+        valid_urls.append(url)
+    
+    if use_js:
+        with browser_session() as driver:
+            for url in valid_urls:
+                output_file = output_path_for(url, output_dir, extension)
+                if scrape_links(url, output_file, scope=scope, verbose=verbose, include_text=include_text,
+                                use_js=use_js, wait_time=wait_time, use_cache=use_cache, driver=driver,
+                                output_format=output_format) != 0:
+                    failures += 1
+    else:
+        cache_dir = os.path.join(output_dir, HTTP_CACHE_DIRNAME) if use_cache else None
+        if HTTPX_AVAILABLE:
+            pages = asyncio.run(fetch_pages_async(valid_urls, verbose=verbose, cache_dir=cache_dir))
+        else:
+            pages = fetch_pages_threaded(valid_urls, verbose=verbose, cache_dir=cache_dir)
+        
+        for url, html in zip(valid_urls, pages):
+            if html is None:
+                failures += 1
+                continue
+            output_file = output_path_for(url, output_dir, extension)
+            if scrape_html(html, url, output_file, scope=scope, verbose=verbose, include_text=include_text,
+                           output_format=output_format) != 0:
+                failures += 1
+    
+    if failures:
+        print(f"[ERROR] {failures} of {len(urls)} URLs failed", file=sys.stderr)
+        return 1
+    
+    return 0
+
+
 def main() -> int:
     """CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -389,23 +1043,44 @@ Examples:
   # Include link text in output
   python script/scrape_links.py https://example.com output/links.txt --include-text
 
+  # Structured JSON output (faster with: pip install orjson)
+  python script/scrape_links.py https://example.com output/links.json --format json --include-text
+
   # Verbose mode for debugging
   python script/scrape_links.py https://example.com output/links.txt --verbose
+
+  # Batch mode: scrape every URL in a file concurrently (faster with: pip install httpx[http2])
+  python script/scrape_links.py --urls-file urls.txt --out-dir output/
         """
     )
     
     parser.add_argument(
         'url',
         type=str,
+        nargs='?',
         help='The URL of the webpage to scrape'
     )
     
     parser.add_argument(
         'output',
         type=str,
+        nargs='?',
         help='Output file path (e.g., output/links.txt)'
     )
     
+    parser.add_argument(
+        '--urls-file',
+        type=str,
+        help='Scrape every URL listed in this file (one per line) instead of a single URL'
+    )
+    
+    parser.add_argument(
+        '--out-dir',
+        type=str,
+        default='output',
+        help='Output directory for batch mode, one file per URL (default: output, only used with --urls-file)'
+    )
+    
     parser.add_argument(
         '--scope',
         type=str,
@@ -420,6 +1095,14 @@ Examples:
         help='Include link text in output (format: URL | Text)'
     )
     
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=['text', 'json'],
+        default='text',
+        help='Output format: text (one link per line) or json (list of {"url"} objects; "text" is added with --include-text) (default: text)'
+    )
+    
     parser.add_argument(
         '--js',
         action='store_true',
@@ -430,7 +1113,13 @@ Examples:
         '--wait',
         type=int,
         default=3,
-        help='Seconds to wait for JavaScript rendering (default: 3, only used with --js)'
+        help='Maximum seconds to wait for links to render (default: 3, only used with --js)'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help=f'Cache fetched pages in {HTTP_CACHE_DIRNAME}/ next to the output and revalidate them with ETag/Last-Modified'
     )
     
     parser.add_argument(
@@ -441,6 +1130,24 @@ Examples:
     
     args = parser.parse_args()
     
+    if args.urls_file:
+        if args.url or args.output:
+            parser.error('url and output cannot be combined with --urls-file (use --out-dir)')
+        return scrape_batch(
+            urls_file=args.urls_file,
+            output_dir=args.out_dir,
+            scope=args.scope,
+            verbose=args.verbose,
+            include_text=args.include_text,
+            use_js=args.js,
+            wait_time=args.wait,
+            use_cache=args.cache,
+            output_format=args.format
+        )
+    
+    if not args.url or not args.output:
+        parser.error('the following arguments are required: url, output')
+    
     return scrape_links(
         url=args.url,
         output_file=args.output,
@@ -448,7 +1155,9 @@ Examples:
         verbose=args.verbose,
         include_text=args.include_text,
         use_js=args.js,
-        wait_time=args.wait
+        wait_time=args.wait,
+        use_cache=args.cache,
+        output_format=args.format
     )
 
 